@@ -2,32 +2,27 @@
 스윙 매수 타점 모니터링 스크립트
 지투파워, 셀바스헬스케어 2개 종목 집중 모니터링
 """
-import subprocess
-import csv
 from pathlib import Path
 from datetime import datetime
 
+import pandas as pd
+
+from src import swing_signal
+
 
 def run_analysis():
     """스윙 시그널 분석 실행"""
     print(f"[분석 시작] {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("-" * 60)
 
-    result = subprocess.run(
-        [
-            "uv", "run", "python", "-m", "src.swing_signal",
-            "--input", "output/monitor_targets.csv",
-            "--out", "output/monitor_signals.csv",
-        ],
-        capture_output=True,
-        text=True,
-    )
-
-    if result.returncode != 0:
-        print("X 분석 실패:", result.stderr)
-        return
-
-    print(result.stdout)
+    # 매번 인터프리터/uv를 새로 띄우지 않도록 같은 프로세스에서 바로 실행한다.
+    try:
+        swing_signal.run(
+            Path("output/monitor_targets.csv"),
+            Path("output/monitor_signals.csv"),
+        )
+    except Exception as e:
+        print("X 분석 실패:", e)
 
 
 def check_signals():
@@ -40,28 +35,21 @@ def check_signals():
     print("[매수 타점 체크]")
     print("=" * 60)
 
-    with signal_file.open("r", encoding="utf-8-sig") as f:
-        reader = csv.DictReader(f)
-        buy_signals = []
-        watch_list = []
-
-        for row in reader:
-            name = row["name"]
-            signal = row["signal"] == "True"
-            pullback = row["pullback_ok"] == "True"
-            rebound = row["rebound_ok"] == "True"
-            price = row["current_price"]
-            retrace = row["retrace_pct"]
-            vol_ratio = row["volume_ratio"]
-            score = row["signal_score"]
-
-            if signal:
-                buy_signals.append(f">> {name} ({price}원) - 매수 진입 타점!")
-            elif pullback and not rebound:
-                watch_list.append(
-                    f"   {name} ({price}원) - 눌림목 완료, 반등 대기 중"
-                    f"\n   조정: {retrace}% | 거래량: {vol_ratio} | Score: {score}"
-                )
+    # 숫자 컬럼은 CSV에 저장된 표기 그대로 출력하기 위해 문자열로 읽는다.
+    df = pd.read_csv(signal_file, encoding="utf-8-sig", dtype=str, keep_default_na=False)
+    signal = df["signal"] == "True"
+    pullback = df["pullback_ok"] == "True"
+    rebound = df["rebound_ok"] == "True"
+
+    buy_signals = [
+        f">> {r.name} ({r.current_price}원) - 매수 진입 타점!"
+        for r in df[signal].itertuples(index=False)
+    ]
+    watch_list = [
+        f"   {r.name} ({r.current_price}원) - 눌림목 완료, 반등 대기 중"
+        f"\n   조정: {r.retrace_pct}% | 거래량: {r.volume_ratio} | Score: {r.signal_score}"
+        for r in df[~signal & pullback & ~rebound].itertuples(index=False)
+    ]
 
     if buy_signals:
         print("\n[!!!] 매수 신호 발생! [!!!]")
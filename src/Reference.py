@@ -1,9 +1,53 @@
+import hashlib
+import json
+import operator
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from pathlib import Path
 
 import FinanceDataReader as fdr
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+
+if __package__:
+    from . import indicators_nb as nb
+else:
+    # `python src/Reference.py`로 직접 실행하면 패키지 없이 src/가 sys.path[0]이 된다.
+    import indicators_nb as nb
+
+START_DATE = "2023-01-01"
+CACHE_DIR = Path(".cache/fdr")
+COND_CACHE_DIR = Path(".cache/cond")
+# 조건 판정 로직이 바뀌면 올려서 이전 메모를 무효화한다.
+COND_CACHE_VERSION = 4
+
+
+class RateLimiter:
+    """호출 간격을 초당 rate_per_sec회로 맞추는 리미터 (스레드 안전)
+
+    간격이 이미 지났으면 기다리지 않고, 필요한 만큼만 잠든다.
+    """
+
+    def __init__(self, rate_per_sec=10):
+        self._interval = 1.0 / rate_per_sec
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self._next - now)
+            self._next = max(now, self._next) + self._interval
+        if wait:
+            time.sleep(wait)
+
+
+_fdr_limiter = RateLimiter(rate_per_sec=10)
 
 
 def get_all_us_tickers():
@@ -35,43 +79,6 @@ def get_all_korean_tickers():
         return []
 
 
-def calculate_bollinger_bands(df, period=20, std_dev=2):
-    """볼린저 밴드 계산"""
-    df["BB_Middle"] = df["Close"].rolling(window=period).mean()
-    df["BB_Std"] = df["Close"].rolling(window=period).std()
-    df["BB_Upper"] = df["BB_Middle"] + (std_dev * df["BB_Std"])
-    df["BB_Lower"] = df["BB_Middle"] - (std_dev * df["BB_Std"])
-    return df
-
-
-def calculate_rsi(df, period=14):
-    """RSI 계산"""
-    delta = df["Close"].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-    rs = gain / loss
-    df["RSI"] = 100 - (100 / (1 + rs))
-    return df
-
-
-def calculate_ichimoku(df):
-    """일목균형표 계산"""
-    high_9 = df["High"].rolling(window=9).max()
-    low_9 = df["Low"].rolling(window=9).min()
-    df["Tenkan"] = (high_9 + low_9) / 2
-
-    high_26 = df["High"].rolling(window=26).max()
-    low_26 = df["Low"].rolling(window=26).min()
-    df["Kijun"] = (high_26 + low_26) / 2
-
-    df["SpanA"] = ((df["Tenkan"] + df["Kijun"]) / 2).shift(26)
-
-    high_52 = df["High"].rolling(window=52).max()
-    low_52 = df["Low"].rolling(window=52).min()
-    df["SpanB"] = ((high_52 + low_52) / 2).shift(26)
-    return df
-
-
 def find_support_levels(df, lookback=52, tolerance=0.02):
     """지지선 찾기: 저점이 반복된 구간"""
     lows = df["Low"].tail(lookback).values
@@ -79,106 +86,240 @@ def find_support_levels(df, lookback=52, tolerance=0.02):
     lows = lows[lows > 0]
 
     if len(lows) == 0:
-        return []
+        return np.empty(0)
+
+    lows = lows.astype(np.float64)
+    # 각 저점(행) 기준으로 허용 오차 안에 있는 저점 수를 한 번에 센다.
+    nearby = np.abs(lows[None, :] - lows[:, None]) / lows[:, None] < tolerance
+    strength = nearby.sum(axis=1)
+
+    idx = np.nonzero(strength >= 3)[0]
+    if idx.size == 0:
+        return np.empty(0)
+
+    # 같은 가격은 처음 나온 것만 남기고 강도 순으로 상위 3개.
+    # 동률 순서는 기존 DataFrame.sort_values(ascending=False)와 같게 맞춘다.
+    _, first = np.unique(lows[idx], return_index=True)
+    idx = idx[np.sort(first)]
+    rev = strength[idx][::-1]
+    order = (len(rev) - 1 - np.argsort(rev, kind="quicksort"))[::-1][:3]
+    return lows[idx[order]]
+
+
+def _cached_read(ticker):
+    """일봉 데이터 조회 (디스크 캐시 + 증분 갱신)
+
+    당일 이미 받은 종목은 parquet 캐시를 그대로 읽고, 이전에 받은 적이 있으면
+    마지막 날짜부터만 다시 받아 캐시에 이어 붙인다.
+    """
+    today = datetime.now().strftime("%Y%m%d")
+    cache_path = CACHE_DIR / f"{ticker}.parquet"
+    meta_path = cache_path.with_suffix(".json")
+
+    cached = None
+    start = START_DATE
+    if cache_path.exists() and meta_path.exists():
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            cached = pd.read_parquet(cache_path)
+        except Exception:
+            cached = None
+        else:
+            if meta.get("fetched") == today:
+                return cached
+            # 마지막 봉은 장중 값일 수 있으므로 그 날짜부터 다시 받아 덮어쓴다.
+            start = meta.get("last_date") or START_DATE
+
+    _fdr_limiter.acquire()
+    fresh = fdr.DataReader(ticker, start=start)
+    if cached is not None and not cached.empty:
+        if fresh is None or fresh.empty:
+            df = cached
+        else:
+            df = pd.concat([cached, fresh])
+            df = df[~df.index.duplicated(keep="last")]
+    else:
+        df = fresh
 
-    support_levels = []
-    for current_low in lows:
-        if current_low <= 0:
-            continue
-        nearby_lows = sum(
-            1
-            for low in lows
-            if low > 0 and abs(low - current_low) / current_low < tolerance
-        )
-        if nearby_lows >= 3:
-            support_levels.append({"price": current_low, "strength": nearby_lows})
+    if df is None or df.empty:
+        return df
 
-    if support_levels:
-        support_df = pd.DataFrame(support_levels)
-        support_df = support_df.drop_duplicates(subset=["price"])
-        support_df = support_df.sort_values("strength", ascending=False)
-        return support_df.head(3)["price"].tolist()
-    return []
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    df.to_parquet(cache_path, compression="zstd")
+    meta_path.write_text(
+        json.dumps({"fetched": today, "last_date": f"{df.index[-1]:%Y-%m-%d}"}),
+        encoding="utf-8",
+    )
+    return df
 
 
-def check_conditions(ticker):
-    """종목별 조건 체크"""
-    try:
-        df = fdr.DataReader(ticker, start="2023-01-01")
-        if df is None or len(df) < 52:
-            return None
+def _has_usable_history(df):
+    """리샘플 전에 걸러내기: 주봉 52개가 나올 수 있고 최근까지 거래된 데이터인지"""
+    if df is None or len(df) < 52:
+        return False
+    first, last = df.index[0], df.index[-1]
+    # 주봉 52개가 나오려면 첫 봉(첫 주의 마지막 날인 일요일)과 마지막 봉(52번째 주의 첫 날인 월요일)이
+    # 최소 50주 + 1일 떨어져 있어야 한다. 그보다 가까우면 52주에 걸칠 수 없다.
+    if (last - first).days < 50 * 7 + 1:
+        return False
+    # 2주 넘게 봉이 없으면 거래정지/상장폐지 종목으로 본다.
+    return last >= pd.Timestamp.today().normalize() - pd.Timedelta(days=14)
+
+
+WEEKLY_AGG = {
+    "Open": "first",
+    "High": "max",
+    "Low": "min",
+    "Close": "last",
+    "Volume": "sum",
+}
+
+
+def load_panel(tickers, max_workers=16):
+    """여러 종목 일봉을 (ticker, date) MultiIndex 하나로 묶어 조회"""
+    frames = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(_cached_read, ticker): ticker for ticker in tickers}
+        for future in as_completed(futures):
+            # 종목 하나의 조회/컬럼 오류가 배치 전체를 멈추지 않도록 건너뛴다 (실패로 집계됨).
+            try:
+                df = future.result()
+                if not _has_usable_history(df):
+                    continue
+                frames[futures[future]] = df[list(WEEKLY_AGG)]
+            except Exception:
+                continue
+
+    if not frames:
+        index = pd.MultiIndex.from_arrays([[], pd.DatetimeIndex([])], names=["ticker", "date"])
+        return pd.DataFrame(columns=list(WEEKLY_AGG), index=index)
+    return pd.concat(frames, names=["ticker", "date"])
+
+
+def resample_weekly(panel):
+    """패널 전체를 한 번의 groupby 집계로 주봉 변환
+
+    resample("W")와 같이 각 날짜를 그 주의 일요일에 묶는다.
+    """
+    if panel.empty:
+        return panel
+    dates = panel.index.get_level_values("date")
+    week = dates.normalize() + pd.to_timedelta((6 - dates.dayofweek) % 7, unit="D")
+    keys = [panel.index.get_level_values("ticker"), week.rename("date")]
+    return panel.groupby(keys).agg(WEEKLY_AGG).dropna()
+
+
+def _condition_key(ticker, df_weekly):
+    """마지막 주봉 내용으로 만든 메모 키 (과거 봉은 바뀌지 않는다고 본다)"""
+    last = ",".join(repr(float(df_weekly[col].iat[-1])) for col in WEEKLY_AGG)
+    raw = f"{COND_CACHE_VERSION}:{ticker}:{len(df_weekly)}:{df_weekly.index[-1]:%Y%m%d}:{last}"
+    return hashlib.blake2b(raw.encode(), digest_size=8).hexdigest()
+
+
+def evaluate_weekly(ticker, df_weekly):
+    """주봉 데이터로 조건 체크 (데이터가 그대로면 이전 결과 재사용)"""
+    if len(df_weekly) < 52:
+        return None
 
-        df_weekly = (
-            df.resample("W")
-            .agg(
-                {
-                    "Open": "first",
-                    "High": "max",
-                    "Low": "min",
-                    "Close": "last",
-                    "Volume": "sum",
-                }
-            )
-            .dropna()
+    key = _condition_key(ticker, df_weekly)
+    memo_path = COND_CACHE_DIR / f"{ticker}.json"
+    try:
+        memo = json.loads(memo_path.read_text(encoding="utf-8"))
+        if memo.get("key") == key:
+            return memo["result"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    conditions = _evaluate_conditions(ticker, df_weekly)
+    if conditions is not None:
+        memo_path.parent.mkdir(parents=True, exist_ok=True)
+        memo_path.write_text(
+            json.dumps({"key": key, "result": conditions}, ensure_ascii=False),
+            encoding="utf-8",
         )
-        if len(df_weekly) < 52:
-            return None
+    return conditions
 
-        df_weekly = calculate_bollinger_bands(df_weekly)
-        df_weekly = calculate_rsi(df_weekly)
-        df_weekly = calculate_ichimoku(df_weekly)
 
-        latest = df_weekly.iloc[-1]
-        current_price = latest["Close"]
-        conditions = {"ticker": ticker, "current_price": current_price, "checks": {}}
+CHECK_BB = 1 << 0
+CHECK_RSI = 1 << 1
+CHECK_SUPPORT = 1 << 2
+CHECK_CLOUD = 1 << 3
+ALL_CHECKS = CHECK_BB | CHECK_RSI | CHECK_SUPPORT | CHECK_CLOUD
 
-        bb_lower = latest["BB_Lower"]
-        if pd.isna(bb_lower) or bb_lower == 0:
-            return None
-        bb_distance = (current_price - bb_lower) / bb_lower * 100
-        conditions["checks"]["볼린저_하단"] = bb_distance <= 5
-        conditions["bb_distance"] = f"{bb_distance:.2f}%"
 
-        rsi = latest["RSI"]
-        if pd.isna(rsi):
-            return None
-        conditions["checks"]["RSI_과매도"] = rsi <= 30
-        conditions["rsi"] = f"{rsi:.2f}"
+def _evaluate_conditions(ticker, df_weekly):
+    """주봉 지표로 4개 조건 판정"""
+    # 조건 판정에는 마지막 주봉 값만 필요하므로 컬럼을 추가하지 않고 배열로 계산한다.
+    high = df_weekly["High"].to_numpy()
+    low = df_weekly["Low"].to_numpy()
+    close = df_weekly["Close"].to_numpy()
+    bb_lower, rsi, span_a, span_b = nb.latest_values(high, low, close)
 
-        support_levels = find_support_levels(df_weekly)
-        near_support = any(
-            support > 0 and abs(current_price - support) / support < 0.03
-            for support in support_levels
-        )
-        conditions["checks"]["지지선_근처"] = near_support
-        conditions["support_levels"] = (
-            [f"{s:.0f}" for s in support_levels[:2]] if support_levels else []
-        )
+    current_price = float(df_weekly["Close"].iat[-1])
+    conditions = {"ticker": ticker, "current_price": current_price, "checks": {}}
 
-        span_a = latest["SpanA"]
-        span_b = latest["SpanB"]
-        near_cloud = False
-        if not pd.isna(span_a) and not pd.isna(span_b) and span_a > 0 and span_b > 0:
-            cloud_top = max(span_a, span_b)
-            cloud_bottom = min(span_a, span_b)
-            if cloud_bottom <= current_price <= cloud_top:
-                near_cloud = True
-            elif abs(current_price - cloud_bottom) / cloud_bottom < 0.05:
-                near_cloud = True
-            conditions["cloud_range"] = f"{cloud_bottom:.0f}~{cloud_top:.0f}"
-        else:
-            conditions["cloud_range"] = "N/A"
-        conditions["checks"]["구름대_근처"] = near_cloud
+    if pd.isna(bb_lower) or bb_lower == 0:
+        return None
+    bb_distance = (current_price - bb_lower) / bb_lower * 100
+    near_bb = bb_distance <= 5
+    conditions["checks"]["볼린저_하단"] = near_bb
+    conditions["bb_distance"] = f"{bb_distance:.2f}%"
+
+    if pd.isna(rsi):
+        return None
+    oversold = rsi <= 30
+    conditions["checks"]["RSI_과매도"] = oversold
+    conditions["rsi"] = f"{rsi:.2f}"
+
+    support_levels = find_support_levels(df_weekly)
+    near_support = support_levels.size > 0 and bool(
+        (np.abs(current_price - support_levels) / support_levels < 0.03).any()
+    )
+    conditions["checks"]["지지선_근처"] = near_support
+    conditions["support_levels"] = [f"{s:.0f}" for s in support_levels[:2]]
+
+    near_cloud = False
+    if not pd.isna(span_a) and not pd.isna(span_b) and span_a > 0 and span_b > 0:
+        cloud_top = max(span_a, span_b)
+        cloud_bottom = min(span_a, span_b)
+        if cloud_bottom <= current_price <= cloud_top:
+            near_cloud = True
+        elif abs(current_price - cloud_bottom) / cloud_bottom < 0.05:
+            near_cloud = True
+        conditions["cloud_range"] = f"{cloud_bottom:.0f}~{cloud_top:.0f}"
+    else:
+        conditions["cloud_range"] = "N/A"
+    conditions["checks"]["구름대_근처"] = near_cloud
+
+    # checks dict는 출력용으로만 두고, 통과 개수/전체 통과는 비트 플래그로 계산한다.
+    flags = (
+        (CHECK_BB if near_bb else 0)
+        | (CHECK_RSI if oversold else 0)
+        | (CHECK_SUPPORT if near_support else 0)
+        | (CHECK_CLOUD if near_cloud else 0)
+    )
+    conditions["all_passed"] = flags == ALL_CHECKS
+    conditions["passed_count"] = flags.bit_count()
+    return conditions
 
-        conditions["all_passed"] = all(conditions["checks"].values())
-        conditions["passed_count"] = sum(conditions["checks"].values())
-        return conditions
+
+def check_conditions(ticker):
+    """종목별 조건 체크"""
+    try:
+        df = _cached_read(ticker)
+        if not _has_usable_history(df):
+            return None
+        df_weekly = df.resample("W").agg(WEEKLY_AGG).dropna()
+        return evaluate_weekly(ticker, df_weekly)
     except Exception:
         return None
 
 
-def screen_stocks(tickers, min_conditions=3, show_errors=False):
-    """종목 스크리닝"""
+def screen_stocks(tickers, min_conditions=3, show_errors=False, max_workers=16, batch_size=200):
+    """종목 스크리닝
+
+    batch_size개씩 스레드 풀로 동시에 조회한 뒤, 배치 단위로 한 번에 주봉 변환한다.
+    """
     results = []
     total = len(tickers)
     failed = 0
@@ -187,35 +328,44 @@ def screen_stocks(tickers, min_conditions=3, show_errors=False):
     print(f"\n총 {total}개 종목 분석 시작...")
     print(f"최소 {min_conditions}개 조건 통과 종목만 수집합니다.\n")
 
-    for i, ticker in enumerate(tickers, 1):
-        if i % 50 == 0:
-            print(
-                f"진행상황: {i}/{total} ({i/total*100:.1f}%) - "
-                f"발견: {len(results)}개 실패: {failed}개"
-            )
-            if show_errors and error_reasons:
-                print(f"  실패 원인: {dict(list(error_reasons.items())[:3])}")
+    i = 0
+    for start in range(0, total, batch_size):
+        batch = tickers[start : start + batch_size]
+        weekly = resample_weekly(load_panel(batch, max_workers=max_workers))
+        by_ticker = {
+            ticker: group.droplevel("ticker")
+            for ticker, group in weekly.groupby(level="ticker", sort=False)
+        }
+
+        for ticker in batch:
+            i += 1
+            try:
+                df_weekly = by_ticker.get(ticker)
+                result = None if df_weekly is None else evaluate_weekly(ticker, df_weekly)
+                if result and result["passed_count"] >= min_conditions:
+                    results.append(result)
+                    print(
+                        f"✅ {ticker}: {result['passed_count']}/4 조건 통과 "
+                        f"(현재가: {result['current_price']:.0f}, RSI: {result['rsi']})"
+                    )
+                elif result is None:
+                    failed += 1
+                    reason = "데이터 부족"
+                    error_reasons[reason] = error_reasons.get(reason, 0) + 1
+            except Exception as e:
+                failed += 1
+                error_type = type(e).__name__
+                error_reasons[error_type] = error_reasons.get(error_type, 0) + 1
+                if show_errors and failed <= 5:
+                    print(f"❌ {ticker} 실패: {error_type} - {str(e)[:50]}")
 
-        try:
-            result = check_conditions(ticker)
-            if result and result["passed_count"] >= min_conditions:
-                results.append(result)
+            if i % 50 == 0:
                 print(
-                    f"✅ {ticker}: {result['passed_count']}/4 조건 통과 "
-                    f"(현재가: {result['current_price']:.0f}, RSI: {result['rsi']})"
+                    f"진행상황: {i}/{total} ({i/total*100:.1f}%) - "
+                    f"발견: {len(results)}개 실패: {failed}개"
                 )
-            elif result is None:
-                failed += 1
-                reason = "데이터 부족"
-                error_reasons[reason] = error_reasons.get(reason, 0) + 1
-        except Exception as e:
-            failed += 1
-            error_type = type(e).__name__
-            error_reasons[error_type] = error_reasons.get(error_type, 0) + 1
-            if show_errors and failed <= 5:
-                print(f"❌ {ticker} 실패: {error_type} - {str(e)[:50]}")
-
-        time.sleep(0.1)
+                if show_errors and error_reasons:
+                    print(f"  실패 원인: {dict(list(error_reasons.items())[:3])}")
 
     print(
         f"\n최종 통계: 총 {total}개 성공 {total-failed}개 실패 {failed}개 "
@@ -228,32 +378,38 @@ def screen_stocks(tickers, min_conditions=3, show_errors=False):
     return results
 
 
+RESULT_COLUMNS = {
+    "ticker": "종목코드",
+    "current_price": "현재가",
+    "passed_count": "통과조건수",
+    "rsi": "RSI",
+    "bb_distance": "볼린저하단대비",
+    "support_levels": "지지선",
+    "cloud_range": "구름대범위",
+    "all_passed": "모든조건통과",
+}
+_result_fields = operator.itemgetter(*RESULT_COLUMNS)
+
+
 def save_results(results, filename="screening_results.csv"):
     """결과를 CSV로 저장"""
     if not results:
         print("저장할 결과가 없습니다.")
         return
 
-    df_list = []
-    for r in results:
-        df_list.append(
-            {
-                "종목코드": r["ticker"],
-                "현재가": r["current_price"],
-                "통과조건수": r["passed_count"],
-                "RSI": r["rsi"],
-                "볼린저하단대비": r["bb_distance"],
-                "지지선": ", ".join(r["support_levels"]),
-                "구름대범위": r["cloud_range"],
-                "모든조건통과": "예" if r["all_passed"] else "아니오",
-            }
-        )
-
-    df = pd.DataFrame(df_list)
-    df = df.sort_values("통과조건수", ascending=False)
-    df.to_csv(filename, index=False, encoding="utf-8-sig")
+    # 행마다 한글 키 dict를 만들지 않고, 결과에서 컬럼 단위로 바로 꺼내 표를 만든다.
+    columns = dict(zip(RESULT_COLUMNS, zip(*map(_result_fields, results))))
+    levels = pa.array(columns["support_levels"], type=pa.list_(pa.string()))
+    columns["support_levels"] = pc.binary_join(levels, ", ")
+    columns["all_passed"] = pc.if_else(pa.array(columns["all_passed"]), "예", "아니오")
+    table = pa.table(columns).rename_columns(list(RESULT_COLUMNS.values()))
+    table = table.sort_by([("통과조건수", "descending")])
+    # 엑셀에서 한글이 깨지지 않도록 utf-8-sig와 같이 BOM을 먼저 쓴다.
+    with open(filename, "wb") as f:
+        f.write(b"\xef\xbb\xbf")
+        pacsv.write_csv(table, f)
     print(f"\n결과가 '{filename}'에 저장되었습니다.")
-    return df
+    return table
 
 
 def display_results(results):
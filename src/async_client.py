@@ -0,0 +1,112 @@
+import asyncio
+import time
+from typing import Any, Coroutine, Iterable, Optional
+
+import httpx
+import orjson
+
+from .auth import TokenManager
+from .client import CONNECT_RETRIES, POOL_SIZE, KiwoomEndpoints
+from .config import KiwoomConfig
+
+
+class AsyncKiwoomClient(KiwoomEndpoints[Coroutine[Any, Any, dict[str, Any]]]):
+    """여러 요청을 동시에 보내기 위한 비동기 클라이언트
+
+    사용 예: `await client.get_stock_charts(codes)`
+    """
+
+    MIN_REQUEST_INTERVAL = 0.35
+    MAX_CONCURRENCY = 3
+
+    def __init__(self, config: Optional[KiwoomConfig] = None):
+        self.config = config or KiwoomConfig.from_env()
+        self._http = httpx.AsyncClient(
+            base_url=self.config.base_url,
+            timeout=20,
+            transport=httpx.AsyncHTTPTransport(
+                http2=True,
+                limits=httpx.Limits(max_keepalive_connections=POOL_SIZE, max_connections=POOL_SIZE),
+                retries=CONNECT_RETRIES,
+            ),
+        )
+        # 토큰 발급/폐기는 드물게 일어나므로 동기 TokenManager를 스레드에서 호출한다.
+        self._token_http = httpx.Client(base_url=self.config.base_url)
+        self.token_manager = TokenManager(self.config, self._token_http)
+        self._token_lock = asyncio.Lock()
+        self._sem = asyncio.Semaphore(self.MAX_CONCURRENCY)
+        self._rate_lock = asyncio.Lock()
+        self._next_allowed = 0.0
+
+    async def _wait_for_rate_limit(self) -> None:
+        # 요청 시작 간격만 MIN_REQUEST_INTERVAL로 맞추고, 응답 대기는 서로 겹치게 둔다.
+        async with self._rate_lock:
+            now = time.monotonic()
+            wait = self._next_allowed - now
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._next_allowed = max(now, self._next_allowed) + self.MIN_REQUEST_INTERVAL
+
+    async def _auth_header(self, api_id: str, rejected: Optional[str] = None) -> dict[str, str]:
+        async with self._token_lock:
+            if rejected is not None:
+                self.token_manager.invalidate(rejected)
+            return await asyncio.to_thread(self.token_manager.get_auth_header, api_id)
+
+    async def _request(
+        self,
+        api_id: str,
+        path: str,
+        body: dict[str, Any],
+        cont_yn: str = "",
+        next_key: str = "",
+        retry_count: int = 3,
+    ) -> dict[str, Any]:
+        async with self._sem:
+            reauthorized = False
+            for attempt in range(retry_count):
+                await self._wait_for_rate_limit()
+                headers = await self._auth_header(api_id)
+                if cont_yn:
+                    headers["cont-yn"] = cont_yn
+                if next_key:
+                    headers["next-key"] = next_key
+
+                try:
+                    response = await self._http.post(path, headers=headers, json=body)
+                    # 캐시된 토큰이 만료 전에 무효화됐으면 버리고 새로 발급받아 한 번만 다시 보낸다.
+                    if response.status_code == 401 and not reauthorized:
+                        reauthorized = True
+                        headers.update(await self._auth_header(api_id, rejected=headers["authorization"]))
+                        await self._wait_for_rate_limit()
+                        response = await self._http.post(path, headers=headers, json=body)
+                    if response.status_code == 429 and attempt < retry_count - 1:
+                        retry_after = response.headers.get("Retry-After")
+                        wait_s = int(retry_after) if retry_after else (attempt + 1) * 2
+                        await asyncio.sleep(wait_s)
+                        continue
+                    response.raise_for_status()
+                    return orjson.loads(response.content)
+                except httpx.HTTPStatusError:
+                    if attempt == retry_count - 1:
+                        raise
+
+        return {"return_code": 1, "return_msg": "request failed"}
+
+    async def get_stock_charts(self, codes: Iterable[str], tick_unit: str = "1") -> list[dict[str, Any]]:
+        """여러 종목의 분봉차트를 한 HTTP/2 연결 위에서 동시에 조회 (결과는 codes 순서)
+
+        ka10080은 요청당 한 종목만 받으므로 종목별 요청을 gather로 겹쳐 보낸다.
+        """
+        return list(await asyncio.gather(*(self.get_stock_chart(code, tick_unit=tick_unit) for code in codes)))
+
+    async def aclose(self) -> None:
+        # 동기 클라이언트와 같이 토큰은 재사용을 위해 폐기하지 않는다.
+        await self._http.aclose()
+        self._token_http.close()
+
+    async def __aenter__(self) -> "AsyncKiwoomClient":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.aclose()
@@ -1,5 +1,10 @@
+import hashlib
+import json
+import os
+import tempfile
 from dataclasses import dataclass
 from datetime import datetime, timedelta
+from pathlib import Path
 from typing import Optional
 
 import httpx
@@ -7,73 +12,135 @@ import httpx
 from .config import KiwoomConfig
 
 
-@dataclass
+EXPIRES_DT_FORMAT = "%Y%m%d%H%M%S"
+
+
+def parse_expires_dt(value: str) -> Optional[datetime]:
+    try:
+        return datetime.strptime(value, EXPIRES_DT_FORMAT)
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(frozen=True, slots=True)
 class Token:
     access_token: str
     token_type: str
-    expires_dt: str
+    # 응답의 expires_dt는 발급 시 한 번만 파싱한다. 알 수 없으면 None(만료 없음).
+    expires_at: Optional[datetime]
 
     @property
     def is_expired(self) -> bool:
-        if not self.expires_dt:
-            return False
-        try:
-            expires_time = datetime.strptime(self.expires_dt, "%Y%m%d%H%M%S")
-            return datetime.now() >= expires_time - timedelta(minutes=1)
-        except ValueError:
-            return False
+        return self.expires_at is not None and datetime.now() >= self.expires_at - timedelta(minutes=1)
 
 
 class TokenManager:
-    def __init__(self, config: KiwoomConfig):
+    def __init__(self, config: KiwoomConfig, http: httpx.Client):
         self.config = config
+        self._http = http
         self._token: Optional[Token] = None
+        self._auth_base: dict[str, str] = {}
+        # 프로세스가 바뀌어도 토큰을 재사용하도록 환경/앱키별로 디스크에 보관한다.
+        key = hashlib.sha256(f"{config.base_url}|{config.app_key}".encode()).hexdigest()[:16]
+        self._cache_path = Path.home() / ".cache" / "kiwoom" / f"token_{key}.json"
 
     @property
     def token(self) -> str:
+        if self._token is None or self._token.is_expired:
+            self._set_token(self._load_from_disk())
         if self._token is None or self._token.is_expired:
             self._refresh_token()
         return self._token.access_token
 
+    def _set_token(self, token: Optional[Token]) -> None:
+        self._token = token
+        # 요청마다 Bearer 문자열을 만들지 않도록 토큰이 바뀔 때만 공통 헤더를 만든다.
+        self._auth_base = (
+            {
+                "authorization": f"Bearer {token.access_token}",
+                "content-type": "application/json;charset=UTF-8",
+            }
+            if token is not None
+            else {}
+        )
+
+    def _load_from_disk(self) -> Optional[Token]:
+        try:
+            data = json.loads(self._cache_path.read_text(encoding="utf-8"))
+            return Token(
+                access_token=data["access_token"],
+                token_type=data["token_type"],
+                expires_at=parse_expires_dt(data["expires_dt"]),
+            )
+        except (OSError, ValueError, TypeError, KeyError):
+            return None
+
+    def _save_to_disk(self, token: Token) -> None:
+        # 만료 시각을 모르는 토큰은 영구히 재사용될 수 있으므로 저장하지 않는다.
+        if token.expires_at is None:
+            return
+        data = {
+            "access_token": token.access_token,
+            "token_type": token.token_type,
+            "expires_dt": token.expires_at.strftime(EXPIRES_DT_FORMAT),
+        }
+        try:
+            self._cache_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self._cache_path.parent, suffix=".tmp")
+            try:
+                os.chmod(tmp, 0o600)
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(data, f)
+                os.replace(tmp, self._cache_path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        except OSError:
+            pass
+
     def _refresh_token(self) -> None:
-        url = f"{self.config.base_url}/oauth2/token"
         payload = {
             "grant_type": "client_credentials",
             "appkey": self.config.app_key,
             "secretkey": self.config.app_secret,
         }
-        with httpx.Client(timeout=15) as client:
-            response = client.post(url, json=payload)
-            response.raise_for_status()
-            result = response.json()
+        response = self._http.post("/oauth2/token", json=payload, timeout=15)
+        response.raise_for_status()
+        result = response.json()
 
         token = result.get("token") or result.get("access_token")
         if not token:
             raise RuntimeError(f"Token missing in response: {result}")
 
-        self._token = Token(
-            access_token=token,
-            token_type=result.get("token_type", "Bearer"),
-            expires_dt=result.get("expires_dt", ""),
+        self._set_token(
+            Token(
+                access_token=token,
+                token_type=result.get("token_type", "Bearer"),
+                expires_at=parse_expires_dt(result.get("expires_dt", "")),
+            )
         )
+        self._save_to_disk(self._token)
+
+    def invalidate(self, authorization: str) -> None:
+        """서버가 거부한 토큰(만료 전 재발급/앱키 변경 등)을 메모리와 디스크에서 버린다.
+
+        authorization은 거부된 요청에 실었던 헤더 값이다. 그 사이 다른 요청이 이미 새 토큰을
+        받았다면 그대로 둔다.
+        """
+        if self._auth_base.get("authorization") != authorization:
+            return
+        self._set_token(None)
+        self._cache_path.unlink(missing_ok=True)
 
     def get_auth_header(self, api_id: str) -> dict[str, str]:
-        return {
-            "api-id": api_id,
-            "authorization": f"Bearer {self.token}",
-            "content-type": "application/json;charset=UTF-8",
-        }
+        self.token  # 만료되었으면 여기서 갱신된다.
+        return {"api-id": api_id, **self._auth_base}
 
     def revoke(self) -> None:
         if self._token is None:
             return
 
-        url = f"{self.config.base_url}/oauth2/revoke"
-        headers = {
-            "api-id": "au10002",
-            "authorization": f"Bearer {self._token.access_token}",
-            "content-type": "application/json;charset=UTF-8",
-        }
+        headers = {"api-id": "au10002", **self._auth_base}
         payload = {
             "appkey": self.config.app_key,
             "secretkey": self.config.app_secret,
@@ -81,7 +148,7 @@ class TokenManager:
         }
 
         try:
-            with httpx.Client(timeout=10) as client:
-                client.post(url, headers=headers, json=payload)
+            self._http.post("/oauth2/revoke", headers=headers, json=payload, timeout=10)
         finally:
-            self._token = None
+            self._set_token(None)
+            self._cache_path.unlink(missing_ok=True)
@@ -1,36 +1,47 @@
+import threading
 import time
 import os
-from typing import Any, Optional
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Generic, Iterable, Optional, TypeVar
 
 import httpx
+import orjson
 
 from .auth import TokenManager
 from .config import KiwoomConfig
 
 
+# 부호(+)/천 단위 구분자/공백을 한 번에 제거한다. 음수 부호는 절대값을 쓰므로 앞에서만 떼어낸다.
+_PRICE_STRIP = str.maketrans("", "", ",+ \t\r\n")
+
+# 공유 커넥션 풀 크기와 연결 실패(접속/타임아웃) 시 재시도 횟수. HTTP 상태 코드 재시도는 _request에서 한다.
+POOL_SIZE = 32
+CONNECT_RETRIES = 3
+
+
 def parse_price(value: str | int | float | None) -> float:
     if value is None:
         return 0.0
     if isinstance(value, (int, float)):
         return abs(float(value))
-    clean = str(value).strip().replace(",", "").lstrip("+-")
+    clean = str(value).translate(_PRICE_STRIP).lstrip("-")
     return float(clean) if clean else 0.0
 
 
-class KiwoomClient:
-    MIN_REQUEST_INTERVAL = 0.35
+# _request의 반환 타입: 동기 클라이언트는 응답 dict, 비동기 클라이언트는 그 dict를 돌려주는 코루틴
+ResponseT = TypeVar("ResponseT")
 
-    def __init__(self, config: Optional[KiwoomConfig] = None):
-        self.config = config or KiwoomConfig.from_env()
-        self.token_manager = TokenManager(self.config)
-        self._last_request_time = 0.0
 
-    def _wait_for_rate_limit(self) -> None:
-        elapsed = time.time() - self._last_request_time
-        if elapsed < self.MIN_REQUEST_INTERVAL:
-            time.sleep(self.MIN_REQUEST_INTERVAL - elapsed)
-        self._last_request_time = time.time()
+class KiwoomEndpoints(ABC, Generic[ResponseT]):
+    """API별 요청 정의 (동기/비동기 클라이언트 공용)
+
+    각 API 메서드는 _request의 반환값을 그대로 돌려준다.
+    """
 
+    config: KiwoomConfig
+
+    @abstractmethod
     def _request(
         self,
         api_id: str,
@@ -39,36 +50,11 @@ class KiwoomClient:
         cont_yn: str = "",
         next_key: str = "",
         retry_count: int = 3,
-    ) -> dict[str, Any]:
-        url = f"{self.config.base_url}{path}"
-
-        for attempt in range(retry_count):
-            self._wait_for_rate_limit()
-            headers = self.token_manager.get_auth_header(api_id)
-            if cont_yn:
-                headers["cont-yn"] = cont_yn
-            if next_key:
-                headers["next-key"] = next_key
-
-            try:
-                with httpx.Client(timeout=20) as client:
-                    response = client.post(url, headers=headers, json=body)
-                    if response.status_code == 429 and attempt < retry_count - 1:
-                        retry_after = response.headers.get("Retry-After")
-                        wait_s = int(retry_after) if retry_after else (attempt + 1) * 2
-                        time.sleep(wait_s)
-                        continue
-                    response.raise_for_status()
-                    return response.json()
-            except httpx.HTTPStatusError:
-                if attempt == retry_count - 1:
-                    raise
-
-        return {"return_code": 1, "return_msg": "request failed"}
+    ) -> ResponseT: ...
 
     # PDF reference endpoints
     # ka10030: 거래량 상위
-    def get_volume_rank(self, market: str = "ALL", count: int = 50) -> dict[str, Any]:
+    def get_volume_rank(self, market: str = "ALL", count: int = 50) -> ResponseT:
         stex_tp = "1" if self.config.is_paper else "3"
         return self._request(
             api_id="ka10030",
@@ -87,7 +73,7 @@ class KiwoomClient:
         )
 
     # ka10027: 전일대비 등락률 상위
-    def get_change_rate_rank(self, market: str = "ALL", count: int = 30) -> dict[str, Any]:
+    def get_change_rate_rank(self, market: str = "ALL", count: int = 30) -> ResponseT:
         stex_tp = "1" if self.config.is_paper else "3"
         return self._request(
             api_id="ka10027",
@@ -106,13 +92,13 @@ class KiwoomClient:
         )
 
     # ka10171: 조건검색 목록
-    def get_condition_list(self) -> dict[str, Any]:
+    def get_condition_list(self) -> ResponseT:
         api_id = os.getenv("KIWOOM_CONDITION_LIST_API_ID", "ka10171")
         path = os.getenv("KIWOOM_CONDITION_PATH", "/api/dostk/websocket")
         return self._request(api_id=api_id, path=path, body={})
 
     # ka10172: 조건검색 결과
-    def search_by_condition(self, condition_idx: str) -> dict[str, Any]:
+    def search_by_condition(self, condition_idx: str) -> ResponseT:
         api_id = os.getenv("KIWOOM_CONDITION_SEARCH_API_ID", "ka10172")
         path = os.getenv("KIWOOM_CONDITION_PATH", "/api/dostk/websocket")
         return self._request(
@@ -122,7 +108,7 @@ class KiwoomClient:
         )
 
     # ka10080: 주식분봉차트조회
-    def get_stock_chart(self, stock_code: str, tick_unit: str = "1") -> dict[str, Any]:
+    def get_stock_chart(self, stock_code: str, tick_unit: str = "1") -> ResponseT:
         return self._request(
             api_id="ka10080",
             path="/api/dostk/chart",
@@ -133,5 +119,92 @@ class KiwoomClient:
             },
         )
 
+
+class KiwoomClient(KiwoomEndpoints[dict[str, Any]]):
+    MIN_REQUEST_INTERVAL = 0.35
+
+    def __init__(self, config: Optional[KiwoomConfig] = None):
+        self.config = config or KiwoomConfig.from_env()
+        # 요청마다 TCP/TLS 연결을 새로 맺지 않도록 커넥션 풀을 가진 클라이언트 하나를 공유한다.
+        # 스레드 동시 요청 중에 연 연결도 닫지 않고 재사용하도록 유지 연결 수를 최대 연결 수와 맞춘다.
+        self._http = httpx.Client(
+            base_url=self.config.base_url,
+            timeout=20,
+            transport=httpx.HTTPTransport(
+                http2=True,
+                limits=httpx.Limits(max_keepalive_connections=POOL_SIZE, max_connections=POOL_SIZE),
+                retries=CONNECT_RETRIES,
+            ),
+        )
+        self.token_manager = TokenManager(self.config, self._http)
+        # 여러 스레드에서 같은 클라이언트를 쓸 수 있도록 토큰 갱신과 요청 간격 계산을 잠근다.
+        self._token_lock = threading.Lock()
+        self._rate_lock = threading.Lock()
+        self._next_allowed = 0.0
+
+    def _wait_for_rate_limit(self) -> None:
+        # 시작 시각만 잠금 안에서 예약하고, 대기와 응답 수신은 스레드끼리 겹치게 둔다.
+        with self._rate_lock:
+            now = time.monotonic()
+            start = max(now, self._next_allowed)
+            self._next_allowed = start + self.MIN_REQUEST_INTERVAL
+        if start > now:
+            time.sleep(start - now)
+
+    def _request(
+        self,
+        api_id: str,
+        path: str,
+        body: dict[str, Any],
+        cont_yn: str = "",
+        next_key: str = "",
+        retry_count: int = 3,
+    ) -> dict[str, Any]:
+        reauthorized = False
+        for attempt in range(retry_count):
+            self._wait_for_rate_limit()
+            with self._token_lock:
+                headers = self.token_manager.get_auth_header(api_id)
+            if cont_yn:
+                headers["cont-yn"] = cont_yn
+            if next_key:
+                headers["next-key"] = next_key
+
+            try:
+                response = self._http.post(path, headers=headers, json=body)
+                # 캐시된 토큰이 만료 전에 무효화됐으면 버리고 새로 발급받아 한 번만 다시 보낸다.
+                if response.status_code == 401 and not reauthorized:
+                    reauthorized = True
+                    with self._token_lock:
+                        self.token_manager.invalidate(headers["authorization"])
+                        headers.update(self.token_manager.get_auth_header(api_id))
+                    self._wait_for_rate_limit()
+                    response = self._http.post(path, headers=headers, json=body)
+                if response.status_code == 429 and attempt < retry_count - 1:
+                    retry_after = response.headers.get("Retry-After")
+                    wait_s = int(retry_after) if retry_after else (attempt + 1) * 2
+                    time.sleep(wait_s)
+                    continue
+                response.raise_for_status()
+                return orjson.loads(response.content)
+            except httpx.HTTPStatusError:
+                if attempt == retry_count - 1:
+                    raise
+
+        return {"return_code": 1, "return_msg": "request failed"}
+
+    def get_stock_charts(
+        self, codes: Iterable[str], tick_unit: str = "1", max_workers: int = 8
+    ) -> list[dict[str, Any]]:
+        """여러 종목의 분봉차트를 스레드로 동시에 조회 (ka10080은 요청당 한 종목만 받는다)
+
+        요청 간격은 _wait_for_rate_limit가 맞추므로 스레드는 응답 대기 시간만 겹친다.
+        결과는 codes 순서를 따른다.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(lambda code: self.get_stock_chart(code, tick_unit=tick_unit), codes))
+
     def close(self) -> None:
-        self.token_manager.revoke()
+        # 토큰은 디스크에 보관해 다음 실행에서 재사용하므로 여기서 폐기하지 않는다.
+        # 명시적으로 폐기하려면 token_manager.revoke()를 호출한다.
+        self._http.close()
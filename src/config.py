@@ -1,6 +1,11 @@
 from dataclasses import dataclass
 import os
 
+from dotenv import load_dotenv
+
+# 환경 변수를 읽는 모듈에서 .env를 한 번만 불러온다. 이 패키지를 import하는 스크립트는 따로 부를 필요가 없다.
+_ENV_LOADED = load_dotenv()
+
 
 @dataclass
 class KiwoomConfig:
@@ -0,0 +1,115 @@
+"""주봉 지표 계산용 Numba 커널
+
+조건 판정에 필요한 마지막 봉의 지표 값만 pandas rolling과 같은 정의로 계산한다
+(구간이 모자라면 NaN). 입력은 NaN이 없는 1차원 숫자 배열(dropna된 주봉)을 가정한다.
+정수 가격 배열도 그대로 받되, 원소를 읽자마자 float64로 올려 차이/평균/분산을 모두
+float64로 계산한다.
+"""
+import numpy as np
+from numba import njit
+
+
+@njit(cache=True)
+def bb_lower_latest(close, n, k):
+    """마지막 봉의 볼린저 밴드 하단
+
+    이동 구간의 평균/분산을 Welford 방식으로 갱신하며, 표준편차는 pandas와 같이
+    표본 표준편차(ddof=1)를 사용한다.
+    """
+    size = close.shape[0]
+    if n < 2 or size < n:
+        return np.nan
+
+    mean = 0.0
+    m2 = 0.0
+    for i in range(n):
+        x = np.float64(close[i])
+        delta = x - mean
+        mean += delta / (i + 1)
+        m2 += delta * (x - mean)
+
+    for i in range(n, size):
+        old = np.float64(close[i - n])
+        new = np.float64(close[i])
+        new_mean = mean + (new - old) / n
+        m2 += (new - old) * (new - new_mean + old - mean)
+        mean = new_mean
+    return mean - k * np.sqrt(max(m2, 0.0) / (n - 1))
+
+
+@njit(cache=True)
+def rsi_latest(close, n):
+    """마지막 봉의 RSI (상승/하락폭의 n구간 단순 이동평균 기준)"""
+    size = close.shape[0]
+    if size < n:
+        return np.nan
+    gain_sum = 0.0
+    loss_sum = 0.0
+    # 누적합 오차로 0이 아닌 값이 남지 않도록 구간 내 상승/하락 봉 수를 함께 센다.
+    gain_cnt = 0
+    loss_cnt = 0
+    for i in range(size):
+        # 첫 봉은 전일 대비값이 없으므로 상승/하락폭 0으로 본다.
+        delta = np.float64(close[i]) - np.float64(close[i - 1]) if i > 0 else 0.0
+        if delta > 0:
+            gain_sum += delta
+            gain_cnt += 1
+        elif delta < 0:
+            loss_sum -= delta
+            loss_cnt += 1
+        if i >= n:
+            prev = np.float64(close[i - n]) - np.float64(close[i - n - 1]) if i - n > 0 else 0.0
+            if prev > 0:
+                gain_sum -= prev
+                gain_cnt -= 1
+            elif prev < 0:
+                loss_sum += prev
+                loss_cnt -= 1
+        if gain_cnt == 0:
+            gain_sum = 0.0
+        if loss_cnt == 0:
+            loss_sum = 0.0
+
+    gain = gain_sum / n
+    loss = loss_sum / n
+    if loss > 0:
+        return 100.0 - 100.0 / (1.0 + gain / loss)
+    if gain > 0:
+        return 100.0
+    return np.nan
+
+
+@njit(cache=True)
+def _window_mid(high, low, end, n):
+    """high/low의 [end-n+1, end] 구간 (최고가 + 최저가) / 2, 구간이 모자라면 NaN"""
+    if end - n + 1 < 0:
+        return np.nan
+    hi = high[end]
+    lo = low[end]
+    for j in range(end - n + 1, end):
+        if high[j] > hi:
+            hi = high[j]
+        if low[j] < lo:
+            lo = low[j]
+    return (np.float64(hi) + np.float64(lo)) / 2
+
+
+@njit(cache=True)
+def ichimoku_latest(high, low):
+    """마지막 봉의 (선행스팬A, 선행스팬B)
+
+    26봉 전의 9/26/52구간만 보면 되므로 전체 이동 최대/최소를 만들지 않는다.
+    """
+    end = high.shape[0] - 1 - 26
+    if end < 0:
+        return np.nan, np.nan
+    span_a = (_window_mid(high, low, end, 9) + _window_mid(high, low, end, 26)) / 2
+    span_b = _window_mid(high, low, end, 52)
+    return span_a, span_b
+
+
+@njit(cache=True)
+def latest_values(high, low, close, bb_period=20, bb_k=2.0, rsi_period=14):
+    """조건 판정에 쓰는 마지막 봉의 (볼린저 하단, RSI, 선행스팬A, 선행스팬B)"""
+    span_a, span_b = ichimoku_latest(high, low)
+    return bb_lower_latest(close, bb_period, bb_k), rsi_latest(close, rsi_period), span_a, span_b
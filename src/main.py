@@ -1,15 +1,18 @@
 import argparse
 import csv
-from dataclasses import dataclass
+import heapq
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
 
-from dotenv import load_dotenv
+import numexpr as ne
+import numpy as np
 
 from .client import KiwoomClient, parse_price
+from .paths import ensure_dir
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class StockRow:
     code: str
     name: str
@@ -17,13 +20,28 @@ class StockRow:
     volume: int | None
     change_rate: float | None
     swing_score: float | None = None
+    # 키워드 검색용 소문자 코드/이름. 필터할 때마다 lower()를 만들지 않도록 생성 시 한 번만 계산한다.
+    _code_lc: str = field(init=False, repr=False, compare=False)
+    _name_lc: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "_code_lc", self.code.lower())
+        object.__setattr__(self, "_name_lc", self.name.lower())
+
+
+def _clean_number(value: Any) -> Any:
+    """숫자는 그대로, 문자열은 천 단위 구분자가 있을 때만 제거"""
+    if type(value) is int or type(value) is float:
+        return value
+    text = value if type(value) is str else str(value)
+    return text.replace(",", "") if "," in text else text
 
 
 def to_int(value: Any) -> int | None:
     if value is None or value == "":
         return None
     try:
-        return int(float(str(value).replace(",", "")))
+        return int(float(_clean_number(value)))
     except ValueError:
         return None
 
@@ -32,39 +50,43 @@ def to_float(value: Any) -> float | None:
     if value is None or value == "":
         return None
     try:
-        return float(str(value).replace(",", ""))
+        return float(_clean_number(value))
     except ValueError:
         return None
 
 
+CODE_KEYS = ("stk_cd", "code", "item_cd", "isu_cd")
+NAME_KEYS = ("stk_nm", "name", "item_nm", "isu_nm")
+PRICE_KEYS = ("cur_prc", "cur_price", "stck_prpr", "price")
+VOLUME_KEYS = ("acml_vol", "trde_qty", "now_trde_qty", "volume")
+CHANGE_KEYS = ("flu_rt", "prdy_ctrt", "change_rate")
+
+# 이 행 수 이상이면 범위 조건을 numexpr로 한 번에 평가한다. 작은 입력은 numpy가 더 빠르다.
+NUMEXPR_MIN_ROWS = 10_000
+
+_KEYS_BY_MODE = {
+    "volume": ("tdy_trde_qty_upper", "output", "items"),
+    "change": ("pred_pre_flu_rt_upper", "output", "items"),
+    "default": ("condition_item_list", "stk_list", "output", "items"),
+}
+
+
+def first(item: dict[str, Any], keys: tuple[str, ...]) -> Any:
+    """keys 순서대로 처음 참인 값 (`a or b or ...`와 같이 모두 거짓이면 마지막 값)"""
+    value = None
+    for key in keys:
+        value = item.get(key)
+        if value:
+            return value
+    return value
+
+
 def parse_row(item: dict[str, Any]) -> StockRow:
-    code = str(
-        item.get("stk_cd")
-        or item.get("code")
-        or item.get("item_cd")
-        or item.get("isu_cd")
-        or ""
-    ).strip()
-    name = str(
-        item.get("stk_nm")
-        or item.get("name")
-        or item.get("item_nm")
-        or item.get("isu_nm")
-        or ""
-    ).strip()
-    price_raw = (
-        item.get("cur_prc")
-        or item.get("cur_price")
-        or item.get("stck_prpr")
-        or item.get("price")
-    )
-    volume_raw = (
-        item.get("acml_vol")
-        or item.get("trde_qty")
-        or item.get("now_trde_qty")
-        or item.get("volume")
-    )
-    change_raw = item.get("flu_rt") or item.get("prdy_ctrt") or item.get("change_rate")
+    code = str(first(item, CODE_KEYS) or "").strip()
+    name = str(first(item, NAME_KEYS) or "").strip()
+    price_raw = first(item, PRICE_KEYS)
+    volume_raw = first(item, VOLUME_KEYS)
+    change_raw = first(item, CHANGE_KEYS)
 
     return StockRow(
         code=code,
@@ -75,30 +97,61 @@ def parse_row(item: dict[str, Any]) -> StockRow:
     )
 
 
-def extract_items(response: dict[str, Any], mode: str) -> list[dict[str, Any]]:
+def extract_items(response: dict[str, Any], mode: str) -> Iterator[dict[str, Any]]:
+    """응답에서 종목 항목을 하나씩 꺼낸다 (parse_row가 바로 소비하도록 중간 리스트를 만들지 않는다)"""
     if not isinstance(response, dict):
-        return []
+        return
 
-    if mode == "volume":
-        keys = ["tdy_trde_qty_upper", "output", "items"]
-    elif mode == "change":
-        keys = ["pred_pre_flu_rt_upper", "output", "items"]
-    else:
-        keys = ["condition_item_list", "stk_list", "output", "items"]
+    keys = _KEYS_BY_MODE.get(mode, _KEYS_BY_MODE["default"])
+    body = response.get("body")
+    containers = (response, body) if isinstance(body, dict) else (response,)
 
-    for key in keys:
-        value = response.get(key)
-        if isinstance(value, list):
-            return [x for x in value if isinstance(x, dict)]
+    for container in containers:
+        for key in keys:
+            value = container.get(key)
+            if isinstance(value, list):
+                for x in value:
+                    if type(x) is dict:
+                        yield x
+                return
 
-    body = response.get("body", {})
-    if not isinstance(body, dict):
-        return []
-    for key in keys:
-        value = body.get(key)
-        if isinstance(value, list):
-            return [x for x in value if isinstance(x, dict)]
-    return []
+
+def _range_mask(
+    rows: list[StockRow],
+    min_price: float | None,
+    max_price: float | None,
+    min_volume: int | None,
+) -> np.ndarray | None:
+    """가격/거래량 범위 조건 마스크 (조건이 없으면 None)"""
+    terms: list[str] = []
+    local: dict[str, Any] = {}
+    if min_price is not None or max_price is not None:
+        local["price"] = np.array([np.nan if r.price is None else r.price for r in rows], dtype=np.float64)
+        if min_price is not None:
+            terms.append("(price >= min_price)")
+            local["min_price"] = float(min_price)
+        if max_price is not None:
+            terms.append("(price <= max_price)")
+            local["max_price"] = float(max_price)
+    if min_volume is not None:
+        local["volume"] = np.array([-1 if r.volume is None else r.volume for r in rows], dtype=np.int64)
+        local["has_volume"] = np.array([r.volume is not None for r in rows], dtype=np.bool_)
+        local["min_volume"] = int(min_volume)
+        terms.append("has_volume & (volume >= min_volume)")
+    if not terms:
+        return None
+
+    if len(rows) >= NUMEXPR_MIN_ROWS:
+        return ne.evaluate(" & ".join(terms), local_dict=local)
+
+    mask = np.ones(len(rows), dtype=np.bool_)
+    if min_price is not None:
+        mask &= local["price"] >= min_price
+    if max_price is not None:
+        mask &= local["price"] <= max_price
+    if min_volume is not None:
+        mask &= local["has_volume"] & (local["volume"] >= min_volume)
+    return mask
 
 
 def filter_rows(
@@ -108,20 +161,21 @@ def filter_rows(
     max_price: float | None,
     min_volume: int | None,
 ) -> list[StockRow]:
-    key = keyword.lower() if keyword else None
-    result: list[StockRow] = []
-
-    for row in rows:
-        if key and key not in row.code.lower() and key not in row.name.lower():
-            continue
-        if min_price is not None and (row.price is None or row.price < min_price):
-            continue
-        if max_price is not None and (row.price is None or row.price > max_price):
-            continue
-        if min_volume is not None and (row.volume is None or row.volume < min_volume):
-            continue
-        result.append(row)
-    return result
+    # 가격/거래량 조건은 필드 배열의 마스크로 한 번에 거르고, 조합별로 루프를 따로 둬
+    # 주어지지 않은 조건은 행마다 검사하지 않는다.
+    range_mask = _range_mask(rows, min_price, max_price, min_volume)
+    if keyword:
+        key = keyword.lower()
+        if range_mask is None:
+            return [r for r in rows if key in r._code_lc or key in r._name_lc]
+        return [
+            r
+            for r, ok in zip(rows, range_mask.tolist())
+            if ok and (key in r._code_lc or key in r._name_lc)
+        ]
+    if range_mask is None:
+        return list(rows)
+    return [rows[i] for i in np.flatnonzero(range_mask).tolist()]
 
 
 def get_rows_by_mode(client: KiwoomClient, mode: str, condition_idx: str | None) -> list[StockRow]:
@@ -141,11 +195,30 @@ def get_rows_by_mode(client: KiwoomClient, mode: str, condition_idx: str | None)
     return [parse_row(item) for item in extract_items(response, mode)]
 
 
+def _rank_desc(rows: list[StockRow], keys: np.ndarray, codes: set[str]) -> dict[str, int]:
+    """keys 내림차순 순위 (동률은 원래 순서 유지), codes에 속한 종목만 반환"""
+    order = np.argsort(-keys, kind="stable")
+    return {rows[i].code: rank for rank, i in enumerate(order.tolist()) if rows[i].code in codes}
+
+
+def _swing_score(row: StockRow) -> float:
+    return row.swing_score or 0.0
+
+
+def rank_swing_rows(rows: list[StockRow], limit: int | None = None) -> list[StockRow]:
+    """swing_score 내림차순 (동률은 원래 순서), limit이 있으면 상위 limit개만 heapq로 고른다"""
+    if limit is not None and 0 <= limit < len(rows):
+        return heapq.nlargest(limit, rows, key=_swing_score)
+    scores = np.array([_swing_score(x) for x in rows], dtype=np.float64)
+    return [rows[i] for i in np.argsort(-scores, kind="stable").tolist()]
+
+
 def build_swing_rows(
     volume_rows: list[StockRow],
     change_rows: list[StockRow],
     min_change: float,
     max_change: float,
+    rank: bool = True,
 ) -> list[StockRow]:
     vol_map = {x.code: x for x in volume_rows if x.code}
     chg_map = {x.code: x for x in change_rows if x.code}
@@ -153,8 +226,13 @@ def build_swing_rows(
     if not common_codes:
         return []
 
-    vol_rank = {r.code: i for i, r in enumerate(sorted(volume_rows, key=lambda x: x.volume or 0, reverse=True))}
-    chg_rank = {r.code: i for i, r in enumerate(sorted(change_rows, key=lambda x: x.change_rate or -999.0, reverse=True))}
+    # 순위는 각 순위표 전체 기준이므로 정렬은 전체로 하고, 사전은 교집합 종목만 만든다.
+    vol_rank = _rank_desc(
+        volume_rows, np.array([x.volume or 0 for x in volume_rows], dtype=np.int64), common_codes
+    )
+    chg_rank = _rank_desc(
+        change_rows, np.array([x.change_rate or -999.0 for x in change_rows], dtype=np.float64), common_codes
+    )
 
     rows: list[StockRow] = []
     for code in common_codes:
@@ -180,22 +258,20 @@ def build_swing_rows(
             )
         )
 
-    rows.sort(key=lambda x: (x.swing_score or 0.0), reverse=True)
-    return rows
+    return rank_swing_rows(rows) if rank else rows
 
 
 def write_csv(path: str, rows: list[StockRow]) -> None:
     target = Path(path)
-    target.parent.mkdir(parents=True, exist_ok=True)
-    with target.open("w", newline="", encoding="utf-8-sig") as f:
+    ensure_dir(target.parent)
+    with target.open("w", newline="", encoding="utf-8-sig", buffering=1 << 20) as f:
         writer = csv.writer(f)
         writer.writerow(["code", "name", "price", "volume", "change_rate", "swing_score"])
-        for r in rows:
-            writer.writerow([r.code, r.name, r.price, r.volume, r.change_rate, r.swing_score])
+        writer.writerows((r.code, r.name, r.price, r.volume, r.change_rate, r.swing_score) for r in rows)
 
 
 def parse_args() -> argparse.Namespace:
-    parser = argparse.ArgumentParser(description="Kiwoom REST API stock list extractor")
+    parser = argparse.ArgumentParser(description="Kiwoom REST API stock list extractor", allow_abbrev=False)
     parser.add_argument(
         "--mode",
         choices=["volume", "change", "condition", "swing"],
@@ -214,8 +290,8 @@ def parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
-def print_rows(mode: str, rows: list[StockRow], limit: int) -> None:
-    print(f"mode={mode} total={len(rows)}")
+def print_rows(mode: str, rows: list[StockRow], limit: int, total: int | None = None) -> None:
+    print(f"mode={mode} total={len(rows) if total is None else total}")
     if mode == "swing":
         print("code\tname\tprice\tvolume\tchange_rate\tswing_score")
         for row in rows[:limit]:
@@ -230,7 +306,6 @@ def print_rows(mode: str, rows: list[StockRow], limit: int) -> None:
 
 
 def main() -> None:
-    load_dotenv()
     args = parse_args()
     client = KiwoomClient()
 
@@ -243,6 +318,7 @@ def main() -> None:
                 change_rows=change_rows,
                 min_change=args.swing_min_change,
                 max_change=args.swing_max_change,
+                rank=False,
             )
         else:
             rows = get_rows_by_mode(client, args.mode, args.condition_idx)
@@ -255,7 +331,13 @@ def main() -> None:
             min_volume=args.min_volume,
         )
 
-        print_rows(args.mode, filtered, args.limit)
+        total = len(filtered)
+        if args.mode == "swing":
+            # 필터는 순서를 바꾸지 않으므로 정렬을 필터 뒤로 미뤄도 결과가 같다.
+            # CSV를 저장하지 않으면 출력할 상위 limit개만 고른다.
+            filtered = rank_swing_rows(filtered, None if args.out else args.limit)
+
+        print_rows(args.mode, filtered, args.limit, total)
         if args.out:
             write_csv(args.out, filtered)
             print(f"saved: {args.out}")
@@ -0,0 +1,11 @@
+from pathlib import Path
+
+# 한 프로세스에서 여러 파일을 저장할 때 같은 디렉터리에 mkdir을 반복하지 않도록 만든 경로를 기억한다.
+_CREATED_DIRS: set[Path] = set()
+
+
+def ensure_dir(path: Path) -> None:
+    key = path.absolute()
+    if key not in _CREATED_DIRS:
+        path.mkdir(parents=True, exist_ok=True)
+        _CREATED_DIRS.add(key)
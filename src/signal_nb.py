@@ -0,0 +1,88 @@
+"""스윙 신호 판정용 Numba 커널
+
+후보별 종가/거래량을 (후보 수, 최대 봉 수) 행렬로 모아 한 번에 계산한다. 각 행은
+앞쪽부터 lengths[i]개 봉만 유효하다. evaluate_signal/evaluate_signals 모두 이 커널을 쓴다.
+"""
+import numpy as np
+from numba import njit, prange
+
+MIN_BARS = 30
+
+
+@njit(cache=True, parallel=True)
+def swing_metrics(closes, volumes, lengths, recent_high_bars, pullback_min, pullback_max, min_vol_ratio):
+    """후보별 (현재가, 되돌림%, 단기MA, 장기MA, 거래량비, 눌림, 반등, 점수)
+
+    봉 수가 MIN_BARS 미만인 행은 현재가를 NaN으로 두고 나머지는 0/False로 둔다.
+    """
+    n = closes.shape[0]
+    current = np.full(n, np.nan)
+    retrace = np.zeros(n)
+    short_ma = np.zeros(n)
+    long_ma = np.zeros(n)
+    vol_ratio = np.zeros(n)
+    pullback_ok = np.zeros(n, dtype=np.bool_)
+    rebound_ok = np.zeros(n, dtype=np.bool_)
+    score = np.zeros(n)
+
+    for i in prange(n):
+        size = lengths[i]
+        if size < MIN_BARS:
+            continue
+        c = closes[i]
+        v = volumes[i]
+
+        cur = c[size - 1]
+        high_start = size - recent_high_bars if 0 < recent_high_bars < size else 0
+
+        # 종가 구간(최근 고점, 20/5봉 합계, 직전 5봉 고점)은 모두 끝에서 끝나므로,
+        # 가장 먼 시작점부터 한 번만 훑으며 같이 구한다.
+        recent_high = c[high_start]
+        prev5_high = c[size - 6]
+        short_sum = 0.0
+        long_sum = 0.0
+        for j in range(min(high_start, size - 20), size):
+            x = c[j]
+            if j > high_start and x > recent_high:
+                recent_high = x
+            if j >= size - 20:
+                long_sum += x
+                if j >= size - 5:
+                    short_sum += x
+            if size - 6 < j < size - 1 and x > prev5_high:
+                prev5_high = x
+        rt = (recent_high - cur) / recent_high * 100 if recent_high > 0 else 0.0
+        sma = short_sum / 5
+        lma = long_sum / 20
+
+        # 직전 20봉과 최근 5봉 거래량도 이어진 구간이라 한 번에 누적한다.
+        prev_sum = 0.0
+        recent_sum = 0.0
+        for j in range(size - 25, size):
+            if j < size - 5:
+                prev_sum += v[j]
+            else:
+                recent_sum += v[j]
+        recent_vol = recent_sum / 5
+        prev_vol = prev_sum / 20
+        vr = recent_vol / prev_vol if prev_vol > 0 else 0.0
+
+        pb = pullback_min <= rt <= pullback_max and lma > 0 and cur >= lma * 0.98
+        rb = cur >= prev5_high and sma >= lma and vr >= min_vol_ratio
+        sc = 0.0
+        if pb:
+            sc += 40.0
+        if rb:
+            sc += 40.0
+        sc += min(20.0, max(0.0, (vr - 1.0) * 20.0))
+
+        current[i] = cur
+        retrace[i] = rt
+        short_ma[i] = sma
+        long_ma[i] = lma
+        vol_ratio[i] = vr
+        pullback_ok[i] = pb
+        rebound_ok[i] = rb
+        score[i] = sc
+
+    return current, retrace, short_ma, long_ma, vol_ratio, pullback_ok, rebound_ok, score
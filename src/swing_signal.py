@@ -2,14 +2,16 @@ import argparse
 import csv
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
 
-from dotenv import load_dotenv
+import numpy as np
 
+from . import signal_nb
 from .client import KiwoomClient, parse_price
+from .paths import ensure_dir
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class SignalRow:
     code: str
     name: str
@@ -27,16 +29,31 @@ class SignalRow:
 def to_int(value: Any) -> int:
     if value is None or value == "":
         return 0
+    if type(value) is int:
+        return value
+    text = value if type(value) is str else str(value)
+    if "," in text:
+        text = text.replace(",", "")
     try:
-        return int(float(str(value).replace(",", "")))
+        return int(float(text))
     except ValueError:
         return 0
 
 
-def read_candidates(path: str) -> list[dict[str, str]]:
+def iter_candidates(path: str) -> Iterator[tuple[str, str]]:
+    """후보 CSV에서 code가 있는 행의 (code, name)을 한 줄씩 읽는다 (행별 dict를 만들지 않는다)"""
     with Path(path).open("r", encoding="utf-8-sig", newline="") as f:
-        reader = csv.DictReader(f)
-        return [row for row in reader if row.get("code")]
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header or "code" not in header:
+            return
+        ci = header.index("code")
+        ni = header.index("name") if "name" in header else -1
+        for row in reader:
+            if len(row) <= ci or not row[ci]:
+                continue
+            name = row[ni] if 0 <= ni < len(row) else ""
+            yield row[ci].strip(), name.strip()
 
 
 def extract_chart_items(response: dict[str, Any]) -> list[dict[str, Any]]:
@@ -56,81 +73,95 @@ def extract_chart_items(response: dict[str, Any]) -> list[dict[str, Any]]:
     return []
 
 
-def to_series(items: list[dict[str, Any]]) -> tuple[list[float], list[int]]:
-    closes: list[float] = []
-    volumes: list[int] = []
-    for item in items:
-        closes.append(
-            parse_price(
-                item.get("cur_prc")
-                or item.get("stk_clsprc")
-                or item.get("close")
-                or 0
-            )
+def to_series(items: list[dict[str, Any]]) -> tuple[np.ndarray, np.ndarray]:
+    closes = np.empty(len(items), dtype=np.float64)
+    volumes = np.empty(len(items), dtype=np.int64)
+    for i, item in enumerate(items):
+        closes[i] = parse_price(
+            item.get("cur_prc")
+            or item.get("stk_clsprc")
+            or item.get("close")
+            or 0
         )
-        volumes.append(to_int(item.get("trde_qty") or item.get("volume") or 0))
+        volumes[i] = to_int(item.get("trde_qty") or item.get("volume") or 0)
     return closes, volumes
 
 
-def avg(values: list[float | int]) -> float:
-    if not values:
-        return 0.0
-    return float(sum(values) / len(values))
+def evaluate_signals(
+    series: list[tuple[str, str, np.ndarray, np.ndarray]],
+    recent_high_bars: int,
+    pullback_min: float,
+    pullback_max: float,
+    min_vol_ratio: float,
+) -> list[SignalRow]:
+    """(code, name, closes, volumes) 목록을 한 번에 판정 (봉 수가 모자란 종목은 제외)"""
+    if not series:
+        return []
+    lengths = np.array([len(closes) for _, _, closes, _ in series], dtype=np.int64)
+    width = max(int(lengths.max()), 1)
+    closes_mat = np.zeros((len(series), width), dtype=np.float64)
+    vols_mat = np.zeros((len(series), width), dtype=np.int64)
+    for i, (_, _, closes, volumes) in enumerate(series):
+        closes_mat[i, : len(closes)] = closes
+        vols_mat[i, : len(volumes)] = volumes
+
+    metrics = signal_nb.swing_metrics(
+        closes_mat,
+        vols_mat,
+        lengths,
+        recent_high_bars,
+        pullback_min,
+        pullback_max,
+        min_vol_ratio,
+    )
+    rows: list[SignalRow] = []
+    for (code, name, _, _), values in zip(series, zip(*(m.tolist() for m in metrics))):
+        current, retrace, short_ma, long_ma, vol_ratio, pullback_ok, rebound_ok, score = values
+        if current != current:  # NaN: 봉 수 부족
+            continue
+        rows.append(
+            SignalRow(
+                code=code,
+                name=name,
+                current_price=current,
+                retrace_pct=retrace,
+                short_ma=short_ma,
+                long_ma=long_ma,
+                volume_ratio=vol_ratio,
+                pullback_ok=pullback_ok,
+                rebound_ok=rebound_ok,
+                signal=pullback_ok and rebound_ok,
+                signal_score=score,
+            )
+        )
+    return rows
 
 
 def evaluate_signal(
     code: str,
     name: str,
-    closes: list[float],
-    volumes: list[int],
+    closes: np.ndarray,
+    volumes: np.ndarray,
     recent_high_bars: int,
     pullback_min: float,
     pullback_max: float,
     min_vol_ratio: float,
 ) -> SignalRow | None:
-    if len(closes) < 30:
-        return None
-
-    current = closes[-1]
-    high_slice = closes[-recent_high_bars:] if len(closes) >= recent_high_bars else closes
-    recent_high = max(high_slice)
-    retrace = ((recent_high - current) / recent_high * 100) if recent_high > 0 else 0.0
-
-    short_ma = avg(closes[-5:])
-    long_ma = avg(closes[-20:])
-    prev5_high = max(closes[-6:-1]) if len(closes) >= 6 else current
-
-    recent_vol = avg(volumes[-5:])
-    prev_vol = avg(volumes[-25:-5])
-    vol_ratio = (recent_vol / prev_vol) if prev_vol > 0 else 0.0
-
-    pullback_ok = pullback_min <= retrace <= pullback_max and (long_ma > 0 and current >= long_ma * 0.98)
-    rebound_ok = current >= prev5_high and short_ma >= long_ma and vol_ratio >= min_vol_ratio
-    signal = pullback_ok and rebound_ok
-    score = 0.0
-    score += 40.0 if pullback_ok else 0.0
-    score += 40.0 if rebound_ok else 0.0
-    score += min(20.0, max(0.0, (vol_ratio - 1.0) * 20.0))
-
-    return SignalRow(
-        code=code,
-        name=name,
-        current_price=current,
-        retrace_pct=retrace,
-        short_ma=short_ma,
-        long_ma=long_ma,
-        volume_ratio=vol_ratio,
-        pullback_ok=pullback_ok,
-        rebound_ok=rebound_ok,
-        signal=signal,
-        signal_score=score,
+    """종목 하나 판정 (evaluate_signals와 같은 커널을 쓴다)"""
+    rows = evaluate_signals(
+        [(code, name, closes, volumes)],
+        recent_high_bars=recent_high_bars,
+        pullback_min=pullback_min,
+        pullback_max=pullback_max,
+        min_vol_ratio=min_vol_ratio,
     )
+    return rows[0] if rows else None
 
 
 def save_csv(path: str, rows: list[SignalRow]) -> None:
     target = Path(path)
-    target.parent.mkdir(parents=True, exist_ok=True)
-    with target.open("w", encoding="utf-8-sig", newline="") as f:
+    ensure_dir(target.parent)
+    with target.open("w", encoding="utf-8-sig", newline="", buffering=1 << 20) as f:
         writer = csv.writer(f)
         writer.writerow(
             [
@@ -147,26 +178,26 @@ def save_csv(path: str, rows: list[SignalRow]) -> None:
                 "signal_score",
             ]
         )
-        for r in rows:
-            writer.writerow(
-                [
-                    r.code,
-                    r.name,
-                    f"{r.current_price:.2f}",
-                    f"{r.retrace_pct:.2f}",
-                    f"{r.short_ma:.2f}",
-                    f"{r.long_ma:.2f}",
-                    f"{r.volume_ratio:.3f}",
-                    r.pullback_ok,
-                    r.rebound_ok,
-                    r.signal,
-                    f"{r.signal_score:.1f}",
-                ]
+        writer.writerows(
+            (
+                r.code,
+                r.name,
+                f"{r.current_price:.2f}",
+                f"{r.retrace_pct:.2f}",
+                f"{r.short_ma:.2f}",
+                f"{r.long_ma:.2f}",
+                f"{r.volume_ratio:.3f}",
+                r.pullback_ok,
+                r.rebound_ok,
+                r.signal,
+                f"{r.signal_score:.1f}",
             )
+            for r in rows
+        )
 
 
 def parse_args() -> argparse.Namespace:
-    parser = argparse.ArgumentParser(description="Pullback/rebound signal checker for weekly swing candidates")
+    parser = argparse.ArgumentParser(description="Pullback/rebound signal checker for weekly swing candidates", allow_abbrev=False)
     parser.add_argument("--input", default="output/weekly_candidates.csv", help="input CSV path")
     parser.add_argument("--tick-unit", default="1", help="minute tick unit for ka10080 (1/3/5/10...)")
     parser.add_argument("--limit", type=int, default=50, help="max rows to print")
@@ -179,54 +210,85 @@ def parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
-def main() -> None:
-    load_dotenv()
-    args = parse_args()
-    candidates = read_candidates(args.input)
+def run(
+    input_csv: str | Path,
+    out_csv: str | Path,
+    tick_unit: str = "1",
+    limit: int = 50,
+    only_signal: bool = False,
+    recent_high_bars: int = 120,
+    pullback_min: float = 3.0,
+    pullback_max: float = 15.0,
+    min_vol_ratio: float = 1.0,
+    max_workers: int = 8,
+) -> list[SignalRow]:
     client = KiwoomClient()
 
     try:
-        rows: list[SignalRow] = []
-        for row in candidates:
-            code = str(row.get("code", "")).strip()
-            name = str(row.get("name", "")).strip()
-            if not code:
-                continue
+        input_count = 0
+        targets: list[tuple[str, str]] = []
+        for code, name in iter_candidates(str(input_csv)):
+            input_count += 1
+            if code:
+                targets.append((code, name))
+        responses = client.get_stock_charts(
+            [code for code, _ in targets], tick_unit=tick_unit, max_workers=max_workers
+        )
 
-            response = client.get_stock_chart(code, tick_unit=args.tick_unit)
+        series: list[tuple[str, str, np.ndarray, np.ndarray]] = []
+        for (code, name), response in zip(targets, responses):
             if response.get("return_code") not in (None, 0):
                 continue
-            items = extract_chart_items(response)
-            closes, volumes = to_series(items)
-            evaluated = evaluate_signal(
-                code,
-                name,
-                closes,
-                volumes,
-                recent_high_bars=args.recent_high_bars,
-                pullback_min=args.pullback_min,
-                pullback_max=args.pullback_max,
-                min_vol_ratio=args.min_vol_ratio,
+            closes, volumes = to_series(extract_chart_items(response))
+            series.append((code, name, closes, volumes))
+
+        rows = evaluate_signals(
+            series,
+            recent_high_bars=recent_high_bars,
+            pullback_min=pullback_min,
+            pullback_max=pullback_max,
+            min_vol_ratio=min_vol_ratio,
+        )
+        # (signal, score, vol_ratio) 내림차순, 동률은 원래 순서. lexsort는 마지막 키가 1순위다.
+        order = np.lexsort(
+            (
+                -np.array([r.volume_ratio for r in rows], dtype=np.float64),
+                -np.array([r.signal_score for r in rows], dtype=np.float64),
+                -np.array([r.signal for r in rows], dtype=np.int8),
             )
-            if evaluated is not None:
-                rows.append(evaluated)
-
-        rows.sort(key=lambda x: (x.signal, x.signal_score, x.volume_ratio), reverse=True)
-        output_rows = [r for r in rows if r.signal] if args.only_signal else rows
+        )
+        rows = [rows[i] for i in order.tolist()]
+        output_rows = [r for r in rows if r.signal] if only_signal else rows
 
-        print(f"input={len(candidates)} analyzed={len(rows)} output={len(output_rows)}")
+        print(f"input={input_count} analyzed={len(rows)} output={len(output_rows)}")
         print("code\tname\tprice\tretrace%\tvol_ratio\tpullback\trebound\tsignal\tscore")
-        for r in output_rows[: args.limit]:
+        for r in output_rows[:limit]:
             print(
                 f"{r.code}\t{r.name}\t{r.current_price:.2f}\t{r.retrace_pct:.2f}\t"
                 f"{r.volume_ratio:.3f}\t{r.pullback_ok}\t{r.rebound_ok}\t{r.signal}\t{r.signal_score:.1f}"
             )
 
-        save_csv(args.out, output_rows)
-        print(f"saved: {args.out}")
+        save_csv(str(out_csv), output_rows)
+        print(f"saved: {out_csv}")
+        return output_rows
     finally:
         client.close()
 
 
+def main() -> None:
+    args = parse_args()
+    run(
+        args.input,
+        args.out,
+        tick_unit=args.tick_unit,
+        limit=args.limit,
+        only_signal=args.only_signal,
+        recent_high_bars=args.recent_high_bars,
+        pullback_min=args.pullback_min,
+        pullback_max=args.pullback_max,
+        min_vol_ratio=args.min_vol_ratio,
+    )
+
+
 if __name__ == "__main__":
     main()